@@ -1,4 +1,7 @@
 API_KEY = "6b1e12**************************"
+geoapify_url = "https://api.geoapify.com/v1/geocode/search"
+# Timeout in seconds for every geocode request
+geoapify_timeout = 10
 
 expected_header = ["Name", "Address"]
 
@@ -52,3 +55,18 @@ translit_dict = {
     "ю": "yu",
     "я": "a",
 }
+
+# MinHash LSH index used by fuzzy_compare_lsh. Use it only with high similarity_score_threshold (~80)
+use_lsh_index = False
+lsh_shingle_size = 3
+lsh_num_perm = 128
+lsh_bands = 32
+lsh_seed = 1
+
+# Partitioned execution (partition.py)
+partition_num_shards = 16
+partition_manifest = "manifest.json"
+
+# Mock Geoapify server (mock_geoapify.py) and load test (load_test.py)
+mock_host = "127.0.0.1"
+mock_port = 8765
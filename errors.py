@@ -20,3 +20,51 @@ class InputFileHeaderNotValid(Exception):
     def __int__(self, message):
         self.message = message
         super().__init__(self.message)
+
+
+class LshIndexParamsNotValid(Exception):
+    """
+    Exception raised in case of wrong MinHash LSH index parameters
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class ShardManifestNotValid(Exception):
+    """
+    Exception raised in case of missing or incomplete shards manifest
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class MockServerConfigNotValid(Exception):
+    """
+    Exception raised in case of wrong mock Geoapify server configuration
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class PartitionParamsNotValid(Exception):
+    """
+    Exception raised in case of wrong partition parameters
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
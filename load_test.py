@@ -0,0 +1,184 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from constants import expected_header
+from main import GroupPeople
+from mock_geoapify import MockConfig, LATENCY_DISTRIBUTIONS, start_server
+
+# Load test of the geocoding path: synthetic address files => GroupPeople (geocode_api=True) => mock server
+
+
+class TimedGroupPeople(GroupPeople):
+    """
+    GroupPeople which records latency and status of every geocode request.
+    The status is the HTTP status code or the exception class name (e.g. ReadTimeout, ConnectionError)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+
+    def geocode_request(self, address: str):
+        start = time.perf_counter()
+        status = None
+        try:
+            response = super().geocode_request(address)
+            status = response.status_code
+            return response
+        except (Exception,) as error:
+            status = type(error).__name__
+            raise
+        finally:
+            self.requests.append((time.perf_counter() - start, status))
+
+    @staticmethod
+    def log_error_address(message: str) -> None:
+        # The failures are counted in the report, do not write failed.txt
+        pass
+
+
+def generate_geocode_file(path: str, rows: int, seed: int = None) -> str:
+    """
+    This function creates synthetic input csv file for the geocoding load test.
+    Bulgarian street and city names, 30% of the people have the same address as somebody else.
+    :param path:  str => file path
+    :param rows:  int => number of rows
+    :param seed:  int => seed of the random generator
+    :return:      str => file path
+    """
+    generator = random.Random(seed)
+    streets = ["ul. Vitosha", "bul. Tsar Osvoboditel", "Graf Ignatiev", "Shipka", "Oak street"]
+    cities = ["Sofia 1000", "Plovdiv 4000", "Varna 9000", "Burgas 8000"]
+    addresses = []
+    data = []
+    for i in range(rows):
+        if addresses and generator.random() < 0.3:
+            address = generator.choice(addresses)
+        else:
+            address = (
+                f"{generator.choice(streets)} {generator.randint(1, 300)}, "
+                f"{generator.choice(cities)}, Bulgaria"
+            )
+            addresses.append(address)
+        data.append([f"Person {i}", address])
+    pd.DataFrame(data, columns=expected_header).to_csv(path, index=False)
+    return path
+
+
+def run_load_test(geocode_url: str, input_files: list, workers: int = 1) -> dict:
+    """
+    This function pushes the rows of the input files through GroupPeople in parallel workers.
+    The rows are split between the workers, so every worker sends its requests at the same time
+    (concurrency = workers). The grouping result is not used.
+    :param geocode_url:  str  => geocode url (mock server)
+    :param input_files:  list => input csv files
+    :param workers:      int  => number of parallel workers
+    :return:             dict => throughput, latency percentiles and failures
+    """
+    data = pd.concat(
+        [pd.read_csv(input_file) for input_file in input_files], ignore_index=True
+    )
+    data = GroupPeople.basic_preprocess_df(data).reset_index(drop=True)
+    chunks = [
+        data.iloc[rows].reset_index(drop=True)
+        for rows in np.array_split(np.arange(len(data)), workers)
+        if len(rows)
+    ]
+    group_people_list = []
+    for _ in chunks:
+        group_people = TimedGroupPeople(
+            geoapify_key="", input_file="", output_dir="", geocode_url=geocode_url
+        )
+        group_people.geocode_api = True
+        group_people.go_preprocessing_address = False
+        group_people_list.append(group_people)
+
+    def process(group_people, chunk):
+        group_people.group_data(chunk)
+
+    start = time.perf_counter()
+    # get_coordinates prints every request => hide the output
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(process, group_people_list, chunks))
+    wall_time = time.perf_counter() - start
+
+    requests_ = [r for group_people in group_people_list for r in group_people.requests]
+    latencies = np.array([latency for latency, _ in requests_]) * 1000
+    # Failures by HTTP status code or exception class name
+    failures = {}
+    for _, status in requests_:
+        if status != 200:
+            failures[status] = failures.get(status, 0) + 1
+    succeeded = len(requests_) - sum(failures.values())
+    return {
+        "files": len(input_files),
+        "workers": len(chunks),
+        "requests": len(requests_),
+        "succeeded": succeeded,
+        "failed": sum(failures.values()),
+        "failures": failures,
+        "wall_time_s": round(wall_time, 3),
+        "total_rps": round(len(requests_) / wall_time, 1) if wall_time else 0.0,
+        "success_rps": round(succeeded / wall_time, 1) if wall_time else 0.0,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else 0.0,
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test of the geocoding path")
+    parser.add_argument("--files", type=int, default=4, help="number of synthetic files")
+    parser.add_argument("--rows", type=int, default=200, help="rows in every file")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="parallel workers (rows are split between them)"
+    )
+    parser.add_argument("--latency", default="lognormal", choices=LATENCY_DISTRIBUTIONS)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mean latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="part of 429 responses")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="part of 5xx responses")
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second")
+    parser.add_argument("--url", default=None, help="use running server instead of local one")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be positive integer")
+
+    server = None
+    url = args.url
+    if url is None:
+        config = MockConfig(
+            latency=args.latency,
+            latency_ms=args.latency_ms,
+            rate_429=args.rate_429,
+            rate_5xx=args.rate_5xx,
+            rate_limit=args.rate_limit,
+            seed=args.seed,
+        )
+        # port 0 => random free port
+        server = start_server(config, port=0)
+        url = server.url
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = [
+            generate_geocode_file(
+                os.path.join(tmp_dir, f"input_{i}.csv"), args.rows, seed=args.seed + i
+            )
+            for i in range(args.files)
+        ]
+        report = run_load_test(url, files, args.workers)
+
+    if server is not None:
+        report["server_responses"] = server.stats
+        server.shutdown()
+    for key, value in report.items():
+        print(f"{key:>16}: {value}")
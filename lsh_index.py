@@ -0,0 +1,367 @@
+import csv
+import hashlib
+import random
+import time
+from itertools import combinations
+
+import numpy as np
+from fuzzywuzzy import fuzz
+
+from errors import LshIndexParamsNotValid
+from constants import (
+    expected_header,
+    lsh_shingle_size,
+    lsh_num_perm,
+    lsh_bands,
+    lsh_seed,
+    similarity_score_threshold,
+)
+
+# Smallest prime bigger than 2**32. Shingle hashes are 32 bit, so (a * x + b) fits in uint64
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(2**32 - 1)
+
+
+class MinHashLSHIndex:
+    """
+    MinHash signatures over character shingles of an address, bucketed with LSH banding.
+    Two addresses become a candidate pair if at least one band of their signatures is equal.
+    Every band is stored as one 64 bit hash. The band hashes are sorted per band, so the candidates
+    of a key are found with binary search (np.searchsorted) instead of scanning all buckets.
+    The index is built incrementally with add() and can be saved to / loaded from a npz file.
+    """
+
+    def __init__(
+        self,
+        shingle_size: int = lsh_shingle_size,
+        num_perm: int = lsh_num_perm,
+        bands: int = lsh_bands,
+        seed: int = lsh_seed,
+    ):
+        if shingle_size < 1 or num_perm < 1 or bands < 1:
+            raise LshIndexParamsNotValid(
+                "shingle_size, num_perm and bands must be positive integers!"
+            )
+        if num_perm % bands != 0:
+            raise LshIndexParamsNotValid(
+                f"num_perm ({num_perm}) must be divisible by bands ({bands})!"
+            )
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        # Random permutations (a * x + b) % prime, generated from the seed
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 2**31, size=(num_perm, 1)).astype(np.uint64)
+        self._b = generator.randint(0, 2**31, size=(num_perm, 1)).astype(np.uint64)
+        # Odd multipliers for the band hash (uint64 arithmetic wraps around)
+        self._band_mult = (
+            generator.randint(0, 2**62, size=self.rows).astype(np.uint64) * 2 + 1
+        )
+        self.keys = []
+        self._key_rows = {}
+        self._band_hashes = np.empty((0, bands), dtype=np.uint64)
+        self._pending = []
+        # Rows sorted per band: _order => rows 0.._sorted_count (saved index),
+        # _tail_order => rows added after that (sorted again when new rows are added)
+        self._order = np.empty((0, bands), dtype=np.int64)
+        self._sorted_count = 0
+        self._tail_order = np.empty((0, bands), dtype=np.int64)
+        # Band hashes in the order of _order and _tail_order
+        self._sorted = np.empty((0, bands), dtype=np.uint64)
+        self._tail_sorted = np.empty((0, bands), dtype=np.uint64)
+        # True if there are keys which are still not saved
+        self.changed = False
+
+    def __contains__(self, key) -> bool:
+        return key in self._key_rows
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def shingles(self, text: str) -> set:
+        """
+        This method splits text into overlapping character shingles
+        :param text:  str => normalized address
+        :return:      set => shingles
+        """
+        text = " ".join(str(text).split())
+        if len(text) <= self.shingle_size:
+            return {text}
+        return {
+            text[i : i + self.shingle_size]
+            for i in range(len(text) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        This method calculates the MinHash signature of the text
+        :param text:  str => normalized address
+        :return:      np.ndarray => uint64 array with length num_perm
+        """
+        hashes = np.array(
+            [
+                int.from_bytes(
+                    hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(),
+                    "little",
+                )
+                for shingle in self.shingles(text)
+            ],
+            dtype=np.uint64,
+        )
+        permuted = (self._a * hashes + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=1)
+
+    def band_hashes(self, text: str) -> np.ndarray:
+        """
+        This method calculates one hash for every band of the MinHash signature
+        :param text:  str => normalized address
+        :return:      np.ndarray => uint64 array with length bands
+        """
+        signature = self.signature(text).reshape(self.bands, self.rows)
+        return (signature * self._band_mult).sum(axis=1, dtype=np.uint64)
+
+    def add(self, key, text: str) -> None:
+        """
+        This method adds text to the index under the given key
+        :param key:   str => stable key, e.g. the normalized address itself
+        :param text:  str => normalized address
+        :return:      None
+        """
+        if key in self._key_rows:
+            raise KeyError(f"Key {key} is already in the index")
+        self._key_rows[key] = len(self.keys)
+        self.keys.append(key)
+        self._pending.append(self.band_hashes(text))
+        self.changed = True
+
+    def _prepare(self) -> None:
+        # Move the pending band hashes to the matrix and sort only the rows after _sorted_count
+        if self._pending:
+            self._band_hashes = np.vstack([self._band_hashes, np.array(self._pending)])
+            self._pending = []
+        if self._sorted_count + len(self._tail_order) < len(self.keys):
+            tail = self._band_hashes[self._sorted_count :]
+            self._tail_order = np.argsort(tail, axis=0, kind="stable") + self._sorted_count
+            self._tail_sorted = np.take_along_axis(self._band_hashes, self._tail_order, axis=0)
+
+    def _sort_all(self) -> None:
+        self._prepare()
+        self._order = np.argsort(self._band_hashes, axis=0, kind="stable")
+        self._sorted = np.take_along_axis(self._band_hashes, self._order, axis=0)
+        self._sorted_count = len(self.keys)
+        self._tail_order = np.empty((0, self.bands), dtype=np.int64)
+        self._tail_sorted = np.empty((0, self.bands), dtype=np.uint64)
+
+    def _bucket_rows(self, band: int, values: np.ndarray) -> list:
+        """
+        This method finds the rows with the given hash values in the band (binary search)
+        :param band:    int => band
+        :param values:  np.ndarray => band hashes
+        :return:        list => np.ndarray of rows for every value
+        """
+        result = [[] for _ in range(len(values))]
+        for order, sorted_hashes in [
+            (self._order[:, band], self._sorted[:, band]),
+            (self._tail_order[:, band], self._tail_sorted[:, band]),
+        ]:
+            if not len(order):
+                continue
+            low = np.searchsorted(sorted_hashes, values, side="left")
+            high = np.searchsorted(sorted_hashes, values, side="right")
+            for i in np.nonzero(high > low)[0]:
+                result[i].append(order[low[i] : high[i]])
+        return [np.concatenate(rows) if rows else np.empty(0, np.int64) for rows in result]
+
+    def query(self, text: str) -> set:
+        """
+        This method returns all keys sharing at least one band with the text
+        :param text:  str => normalized address
+        :return:      set => candidate keys
+        """
+        self._prepare()
+        result = set()
+        for band, value in enumerate(self.band_hashes(text)):
+            rows = self._bucket_rows(band, np.array([value], dtype=np.uint64))[0]
+            result.update(self.keys[row] for row in rows.tolist())
+        return result
+
+    def candidate_pairs(self, keys=None) -> set:
+        """
+        This method returns all pairs of keys sharing at least one band.
+        Only the buckets of the given keys are searched, so the cost depends on the number of keys
+        :param keys:  iterable => return only pairs between these keys (None => all keys)
+        :return:      set => {(key_1, key_2), ...} with key_1 < key_2
+        """
+        if keys is None:
+            rows = np.arange(len(self.keys))
+        else:
+            rows = np.array(
+                sorted(self._key_rows[key] for key in set(keys) if key in self._key_rows),
+                dtype=np.int64,
+            )
+        self._prepare()
+        allowed = set(rows.tolist())
+        pairs = set()
+        for band in range(self.bands):
+            buckets = self._bucket_rows(band, self._band_hashes[rows, band])
+            for row, bucket in zip(rows.tolist(), buckets):
+                # Every row is in its own bucket => only buckets with more rows are candidates
+                if len(bucket) < 2:
+                    continue
+                key_1 = self.keys[row]
+                for other in bucket.tolist():
+                    if other != row and other in allowed:
+                        key_2 = self.keys[other]
+                        pairs.add((key_1, key_2) if key_1 < key_2 else (key_2, key_1))
+        return pairs
+
+    def save(self, path: str) -> None:
+        """
+        This method saves the index as npz file (keys, band hashes matrix and sorted order)
+        :param path:  str => file path
+        :return:      None
+        """
+        self._sort_all()
+        with open(path, "wb") as file:
+            np.savez(
+                file,
+                params=np.array(
+                    [self.shingle_size, self.num_perm, self.bands, self.seed],
+                    dtype=np.int64,
+                ),
+                keys=np.array(self.keys, dtype=str),
+                band_hashes=self._band_hashes,
+                order=self._order,
+            )
+        self.changed = False
+
+    @classmethod
+    def load(cls, path: str) -> "MinHashLSHIndex":
+        """
+        This method loads index saved with save()
+        :param path:  str => file path
+        :return:      MinHashLSHIndex
+        """
+        with np.load(path, allow_pickle=False) as data:
+            shingle_size, num_perm, bands, seed = data["params"].tolist()
+            index = cls(
+                shingle_size=shingle_size, num_perm=num_perm, bands=bands, seed=seed
+            )
+            index.keys = data["keys"].tolist()
+            index._band_hashes = data["band_hashes"]
+            index._order = data["order"]
+        index._sorted = np.take_along_axis(index._band_hashes, index._order, axis=0)
+        index._sorted_count = len(index.keys)
+        index._key_rows = {key: row for row, key in enumerate(index.keys)}
+        # Keys are the addresses => the saved band hashes must match the recalculated ones
+        for row, key in enumerate(index.keys[:10]):
+            if not np.array_equal(index._band_hashes[row], index.band_hashes(key)):
+                raise LshIndexParamsNotValid(
+                    f"Signature of '{key}' in {path} does not match the address!"
+                )
+        return index
+
+
+def benchmark(addresses: list, threshold: int = similarity_score_threshold, **params):
+    """
+    This function compares the LSH candidate pairs with the exact all-pairs baseline
+    :param addresses:  list => normalized addresses
+    :param threshold:  int  => similarity score threshold (fuzz.ratio)
+    :param params:     MinHashLSHIndex parameters
+    :return:           dict => recall, pairs count and time in seconds
+    """
+    start = time.perf_counter()
+    exact_pairs = {
+        (i, j)
+        for i, j in combinations(range(len(addresses)), 2)
+        if fuzz.ratio(addresses[i], addresses[j]) > threshold
+    }
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = MinHashLSHIndex(**params)
+    for key, address in enumerate(addresses):
+        index.add(key, address)
+    candidates = index.candidate_pairs()
+    lsh_pairs = {
+        (i, j)
+        for i, j in candidates
+        if fuzz.ratio(addresses[i], addresses[j]) > threshold
+    }
+    lsh_time = time.perf_counter() - start
+
+    return {
+        "addresses": len(addresses),
+        "exact_pairs": len(exact_pairs),
+        "candidate_pairs": len(candidates),
+        "lsh_pairs": len(lsh_pairs),
+        "recall": len(lsh_pairs) / len(exact_pairs) if exact_pairs else 1.0,
+        "exact_time": exact_time,
+        "lsh_time": lsh_time,
+    }
+
+
+def generate_near_duplicate_file(path: str, rows: int = 1500, seed: int = 1) -> str:
+    """
+    This function creates synthetic input csv file for the benchmark.
+    Random words as street, city and country, 30% of the rows are near-duplicates
+    (copy of previous address with one character removed)
+    :param path:  str => file path
+    :param rows:  int => number of rows
+    :param seed:  int => seed of the random generator
+    :return:      str => file path
+    """
+    generator = random.Random(seed)
+    words = [
+        "".join(
+            generator.choice("abcdefghijklmnoprstuvz")
+            for _ in range(generator.randint(5, 10))
+        )
+        for _ in range(400)
+    ]
+    data = []
+    for i in range(rows):
+        if data and generator.random() < 0.3:
+            address = generator.choice(data)[1]
+            address = address.replace(address[3], "", 1)
+        else:
+            address = (
+                f"{generator.choice(words)} "
+                f"{generator.choice(['street', 'avenue', 'blvd.'])} "
+                f"{generator.randint(1, 200)}, "
+                f"{generator.choice(words)} {generator.randint(1000, 9999)}, "
+                f"{generator.choice(words)}"
+            )
+        data.append([f"Person {i}", address])
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(expected_header)
+        writer.writerows(data)
+    return path
+
+
+if __name__ == "__main__":
+    import sys
+    import pandas as pd
+    from main import GroupPeople
+
+    # Usage: python lsh_index.py generate output.csv [rows] [seed]
+    #        python lsh_index.py input.csv [bands] [threshold]
+    if sys.argv[1] == "generate":
+        generate_near_duplicate_file(
+            sys.argv[2],
+            rows=int(sys.argv[3]) if len(sys.argv) > 3 else 1500,
+            seed=int(sys.argv[4]) if len(sys.argv) > 4 else 1,
+        )
+        sys.exit(0)
+    group_people = GroupPeople(geoapify_key="", input_file=sys.argv[1], output_dir="")
+    data = pd.read_csv(sys.argv[1])
+    group_people.validate_header(data)
+    data = group_people.basic_preprocess_df(data)
+    addresses = [group_people.address_preprocess(a.lower()) for a in data["Address"]]
+    bands = int(sys.argv[2]) if len(sys.argv) > 2 else lsh_bands
+    threshold = int(sys.argv[3]) if len(sys.argv) > 3 else similarity_score_threshold
+    for key, value in benchmark(addresses, threshold, bands=bands).items():
+        print(f"{key:>16}: {value}")
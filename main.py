@@ -7,6 +7,7 @@ import os
 from datetime import datetime
 import pathlib
 from errors import FileCsvNotFoundError, InputFileHeaderNotValid
+from lsh_index import MinHashLSHIndex
 from constants import (
     API_KEY,
     expected_header,
@@ -14,21 +15,32 @@ from constants import (
     translit_dict,
     verbose,
     similarity_score_threshold,
+    use_lsh_index,
+    geoapify_url,
+    geoapify_timeout,
 )
 
 
 # https://www.geoapify.com/
 class GroupPeople:
     def __init__(
-        self, geoapify_key: str, input_file: str, output_dir: str, delta: float = None
+        self,
+        geoapify_key: str,
+        input_file: str,
+        output_dir: str,
+        delta: float = None,
+        geocode_url: str = geoapify_url,
     ):
         self.geoapify_key = geoapify_key
+        self.geocode_url = geocode_url
         self.input_file = input_file
         self.output_dir = output_dir
         self.delta = delta
         self.verbose = False
         self.geocode_api = None
         self.go_preprocessing_address = None
+        self.use_lsh = False
+        self.lsh_index_path = None
 
     def verbose_print(self, *args) -> None:
         """
@@ -129,20 +141,27 @@ class GroupPeople:
                 lat_text += char
         return lat_text
 
-    @staticmethod
-    def get_coordinates(address: str) -> (str, str):
+    def geocode_request(self, address: str):
+        """
+        This method sends the geocode request for the address to self.geocode_url
+        :param address:  str => The address string
+        :return:         requests.Response
+        """
+        # Build the API URL
+        url = f"{self.geocode_url}?text={address}&limit=1&apiKey={API_KEY}"
+        return requests.get(url, timeout=geoapify_timeout)
+
+    def get_coordinates(self, address: str) -> (str, str):
         """
-        This static method get coordinates (latitude, longitude) of given address
+        This method get coordinates (latitude, longitude) of given address
+        using self.geocode_url (e.g. local mock server for load tests)
         :param address:         str => The address string
         :return:       float, float => latitude, longitude
         """
         print(f"address request to the api =>>  {address}")
-        # Build the API URL
-        url = f"https://api.geoapify.com/v1/geocode/search?text={address}&limit=1&apiKey={API_KEY}"
-
         try:
             # Send the API request and get the response
-            response = requests.get(url)
+            response = self.geocode_request(address)
         except (Exception,):
             error_str = f'Requested address: "{address}" failed'
             return None, None, error_str
@@ -456,6 +475,8 @@ class GroupPeople:
         :param   data:  pandas DataFrame
         :return: data:  pandas DataFrame
         """
+        if data.empty:
+            return pd.DataFrame(columns=["GroupedNames"])
         # Calculate the pairwise similarity scores between all addresses
         similarity_scores = data["Address"].apply(
             lambda address1: data["Address"].apply(
@@ -469,8 +490,9 @@ class GroupPeople:
             similarity_df["Address1"] != similarity_df["Address2"]
         ]
         # Group the similar addresses and get the corresponding names using similarity_score_threshold from constants.py
+        # Loop over all rows => row without similar addresses (e.g. the only row in data) is a group itself
         grouped_addresses = []
-        for address in similarity_df["Address1"].unique():
+        for address in data.index:
             similar_addresses = similarity_df[
                 (similarity_df["Address1"] == address)
                 & (similarity_df["SimilarityScore"] > similarity_score_threshold)
@@ -486,7 +508,7 @@ class GroupPeople:
         # Using grouped_addresses extract group_names
         grouped_names = []
         for group in grouped_addresses:
-            names = [data.iloc[index]["Name"] for index in group]
+            names = [data.loc[index, "Name"] for index in group]
             names = sorted(names)
             grouped_names.append(names)
 
@@ -498,6 +520,60 @@ class GroupPeople:
         df = df.sort_values(by="GroupedNames")
         return df
 
+    def fuzzy_compare_lsh(self, data):
+        """
+        This method accepts pandas dataframe and groups the addresses like fuzzy_compare, but:
+        - Builds (or extends loaded from self.lsh_index_path) MinHash LSH index over the addresses
+        - Calculates similarity scores only for the candidate pairs emitted by the index
+        - Saves the index in self.lsh_index_path if provided
+        :param   data:  pandas DataFrame
+        :return: data:  pandas DataFrame
+        """
+        # Load existing index or create new one
+        if self.lsh_index_path and os.path.isfile(self.lsh_index_path):
+            index = MinHashLSHIndex.load(self.lsh_index_path)
+        else:
+            index = MinHashLSHIndex()
+        # The index is keyed by the normalized address, so it can be shared between input files
+        rows_by_address = {}
+        for key, address in data["Address"].items():
+            rows_by_address.setdefault(address, []).append(key)
+        # Add all addresses which are still not in the index
+        for address in rows_by_address:
+            if address not in index:
+                index.add(address, address)
+        # Save the index only if new addresses were added
+        if self.lsh_index_path and index.changed:
+            index.save(self.lsh_index_path)
+
+        # Rows with same address are always similar (score 100)
+        similar = {
+            key: list(rows_by_address[address])
+            for key, address in data["Address"].items()
+        }
+        # Verify the candidate pairs using similarity_score_threshold from constants.py
+        for address_1, address_2 in index.candidate_pairs(rows_by_address.keys()):
+            score = self.calc_similarity(address_1, address_2)
+            if score > similarity_score_threshold:
+                for key in rows_by_address[address_1]:
+                    similar[key].extend(rows_by_address[address_2])
+                for key in rows_by_address[address_2]:
+                    similar[key].extend(rows_by_address[address_1])
+
+        # Get the names for every group of similar addresses
+        grouped_names = []
+        for group in similar.values():
+            names = sorted(data.loc[group, "Name"])
+            if names not in grouped_names:
+                grouped_names.append(names)
+
+        # Create a DataFrame with the concat grouped names by ', '
+        result = [", ".join(names) for names in grouped_names]
+        df = pd.DataFrame(result, columns=["GroupedNames"])
+        # Sort dataframe Alphabetically
+        df = df.sort_values(by="GroupedNames")
+        return df
+
     def process_file(self):
         """
         This method process the input file and generate the result
@@ -516,6 +592,19 @@ class GroupPeople:
         self.validate_header(data)
         # Preprocess dataframe
         data = self.basic_preprocess_df(data)
+        # Group the names
+        temp_result = self.group_data(data)
+        # Save the result
+        self.save_result(temp_result)
+
+    def group_data(self, data):
+        """
+        This method accepts preprocessed input dataframe and groups the names with same address
+        - Get coordinates and preprocessed address for every address
+        - Group by fuzzy compare (geocode_api is False) or by coordinates (geocode_api is True)
+        :param   data:  pandas DataFrame => columns Name, Address
+        :return: data:  pandas DataFrame => column GroupedNames sorted alphabetically
+        """
         # Loop over every row in input data
         self.verbose_print(
             "Apply get_coor_main method logic over all addresses in column Address",
@@ -527,8 +616,12 @@ class GroupPeople:
         # Check if geocode_api is False
         if not self.geocode_api:
             self.verbose_print("-" * 100, "Prepare result file")
-            # Make a fuzzy compare between all addresses
-            temp_result = self.fuzzy_compare(data)
+            if self.use_lsh:
+                # Make a fuzzy compare only between LSH candidate pairs
+                temp_result = self.fuzzy_compare_lsh(data)
+            else:
+                # Make a fuzzy compare between all addresses
+                temp_result = self.fuzzy_compare(data)
         # If geocode_api is True
         else:
             # Get unique lat-long pairs from the data
@@ -571,7 +664,14 @@ class GroupPeople:
 
                 temp_result = pd.DataFrame(temp_result, columns=["GroupedNames"])
                 temp_result = temp_result.sort_values(by="GroupedNames")
+        return temp_result
 
+    def save_result(self, temp_result):
+        """
+        This method saves the result dataframe in unique csv file in the output dir
+        :param temp_result:  pandas DataFrame => column GroupedNames
+        :return:             str => full path for result file
+        """
         # Get time now as string in order to generate unique files without overwrite existing one
         res_path = self.get_path_output_file()
         # Save the result dataframe in csv file
@@ -579,6 +679,7 @@ class GroupPeople:
         # temp_result = temp_result.rename(columns=lambda x: x.strip())
         temp_result.to_csv(res_path, index=False)
         self.verbose_print(f"Result file {res_path} crated successful!")
+        return res_path
 
 
 if __name__ == "__main__":
@@ -623,6 +724,8 @@ if __name__ == "__main__":
             break
         # Set verbose
         group_people.verbose = verbose
+        # Set LSH index usage for the fuzzy compare
+        group_people.use_lsh = use_lsh_index
         # Validate input
         res_val = group_people.validate_input()
         if res_val == 200:
@@ -0,0 +1,267 @@
+import json
+import math
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from errors import MockServerConfigNotValid
+from constants import mock_host, mock_port
+
+# Local stand-in for https://api.geoapify.com/v1/geocode/search used for load tests.
+# The coordinates are calculated from the crc32 of the address text, so same address => same coordinates.
+
+GEOCODE_PATH = "/v1/geocode/search"
+# Bigger limit is capped to MAX_LIMIT features
+MAX_LIMIT = 20
+LATENCY_DISTRIBUTIONS = ["fixed", "uniform", "exponential", "lognormal"]
+
+
+class MockConfig:
+    """
+    Configuration of the mock server
+    Attributes:
+        latency     -- latency distribution: fixed, uniform, exponential or lognormal
+        latency_ms  -- fixed/mean latency (uniform => 0 to 2 * latency_ms) in milliseconds
+        sigma       -- sigma of the lognormal distribution
+        rate_429    -- part of the requests (0 to 1) answered with 429
+        rate_5xx    -- part of the requests (0 to 1) answered with 500, 502 or 503
+        rate_limit  -- max requests per second (None => no limit), above the limit => 429
+        seed        -- seed of the random generator
+    """
+
+    def __init__(
+        self,
+        latency: str = "fixed",
+        latency_ms: float = 0.0,
+        sigma: float = 0.5,
+        rate_429: float = 0.0,
+        rate_5xx: float = 0.0,
+        rate_limit: float = None,
+        seed: int = None,
+    ):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise MockServerConfigNotValid(
+                f"Wrong latency distribution! Possible options {LATENCY_DISTRIBUTIONS}"
+            )
+        if latency_ms < 0 or sigma < 0:
+            raise MockServerConfigNotValid("latency_ms and sigma must not be negative!")
+        if rate_429 < 0 or rate_5xx < 0 or rate_429 + rate_5xx > 1:
+            raise MockServerConfigNotValid(
+                "rate_429 and rate_5xx must not be negative and rate_429 + rate_5xx must be <= 1!"
+            )
+        if rate_limit is not None and rate_limit <= 0:
+            raise MockServerConfigNotValid("rate_limit must be positive or None!")
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+
+    def get_latency(self) -> float:
+        """
+        This method returns random latency in seconds using the latency distribution
+        :return:  float => seconds
+        """
+        mean = self.latency_ms / 1000
+        if self.latency == "uniform":
+            return self.random.uniform(0, 2 * mean)
+        if self.latency == "exponential":
+            return self.random.expovariate(1 / mean) if mean > 0 else 0.0
+        if self.latency == "lognormal":
+            # Scale the distribution so that the mean is latency_ms
+            return (
+                self.random.lognormvariate(0, self.sigma)
+                * mean
+                / math.exp(self.sigma**2 / 2)
+            )
+        return mean
+
+
+class MockGeoapifyServer(ThreadingHTTPServer):
+    """
+    Threading HTTP server with MockConfig, rate limiter and counters of the responses
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: MockConfig, host: str = mock_host, port: int = mock_port):
+        super().__init__((host, port), MockGeoapifyHandler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.stats = {}
+        # Token bucket for rate_limit. Capacity is at least 1 token => rate_limit < 1 still allows requests
+        self.capacity = max(1.0, config.rate_limit or 0.0)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{GEOCODE_PATH}"
+
+    def count(self, status: int) -> None:
+        with self.lock:
+            self.stats[status] = self.stats.get(status, 0) + 1
+
+    def take_token(self) -> bool:
+        """
+        This method takes token from the bucket
+        :return:  bool => False if the rate limit is exceeded
+        """
+        if self.config.rate_limit is None:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.last_refill) * self.config.rate_limit,
+            )
+            self.last_refill = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def choose_status(self) -> int:
+        """
+        This method returns injected error status code or 200
+        :return:  int => status code
+        """
+        with self.lock:
+            value = self.config.random.random()
+            if value < self.config.rate_429:
+                return 429
+            if value < self.config.rate_429 + self.config.rate_5xx:
+                return self.config.random.choice([500, 502, 503])
+            return 200
+
+
+class MockGeoapifyHandler(BaseHTTPRequestHandler):
+    """
+    Handler of GET /v1/geocode/search?text=...&limit=...&apiKey=...
+    """
+
+    def log_message(self, format, *args) -> None:
+        # Do not print every request
+        pass
+
+    def send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the connection (e.g. request timeout)
+            pass
+        self.server.count(status)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path != GEOCODE_PATH:
+            return self.send_json(404, {"statusCode": 404, "error": "Not Found"})
+        if not params.get("apiKey"):
+            return self.send_json(
+                401, {"statusCode": 401, "error": "Unauthorized", "message": "Invalid apiKey"}
+            )
+        if not params.get("text"):
+            return self.send_json(
+                400, {"statusCode": 400, "error": "Bad Request", "message": '"text" is required'}
+            )
+        try:
+            limit = int(params.get("limit", ["1"])[0])
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return self.send_json(
+                400, {"statusCode": 400, "error": "Bad Request", "message": '"limit" must be a positive integer'}
+            )
+        if not self.server.take_token():
+            return self.send_json(
+                429, {"statusCode": 429, "error": "Too Many Requests", "message": "Rate limit exceeded"}
+            )
+
+        time.sleep(self.server.config.get_latency())
+        status = self.server.choose_status()
+        if status != 200:
+            return self.send_json(status, {"statusCode": status, "error": "Injected error"})
+
+        text = params["text"][0]
+        self.send_json(200, geocode_response(text, min(limit, MAX_LIMIT)))
+
+
+def geocode_response(text: str, limit: int = 1) -> dict:
+    """
+    This function creates response with the shape of Geoapify geocode search response
+    :param text:   str => address
+    :param limit:  int => number of features
+    :return:       dict => FeatureCollection
+    """
+    features = []
+    for rank in range(max(limit, 1)):
+        key = f"{text.lower().strip()}|{rank}"
+        # Independent hashes for latitude and longitude
+        lat_hash = zlib.crc32(f"{key}|lat".encode("utf-8"))
+        lon_hash = zlib.crc32(f"{key}|lon".encode("utf-8"))
+        lat = round(-60 + (lat_hash % 1200000) / 10000, 7)
+        lon = round(-180 + (lon_hash % 3600000) / 10000, 7)
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {
+                    "formatted": text,
+                    "lat": lat,
+                    "lon": lon,
+                    "result_type": "building",
+                    "rank": {"confidence": round(1 - rank * 0.1, 2), "match_type": "full_match"},
+                },
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "bbox": [lon, lat, lon, lat],
+            }
+        )
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "query": {"text": text},
+    }
+
+
+def start_server(config: MockConfig, host: str = mock_host, port: int = mock_port):
+    """
+    This function starts the mock server in background thread
+    :param config:  MockConfig
+    :param host:    str
+    :param port:    int => 0 means random free port
+    :return:        MockGeoapifyServer => call shutdown() to stop it
+    """
+    server = MockGeoapifyServer(config, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    # Usage: python3 mock_geoapify.py [latency] [latency_ms] [rate_429] [rate_5xx] [rate_limit]
+    args = sys.argv[1:]
+    config_ = MockConfig(
+        latency=args[0] if len(args) > 0 else "fixed",
+        latency_ms=float(args[1]) if len(args) > 1 else 0.0,
+        rate_429=float(args[2]) if len(args) > 2 else 0.0,
+        rate_5xx=float(args[3]) if len(args) > 3 else 0.0,
+        rate_limit=float(args[4]) if len(args) > 4 else None,
+    )
+    server_ = MockGeoapifyServer(config_)
+    print(f"Mock Geoapify server => {server_.url}")
+    try:
+        server_.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Responses by status code: {server_.stats}")
@@ -0,0 +1,256 @@
+import glob
+import json
+import os
+import re
+import socket
+import sys
+import uuid
+import zlib
+
+import pandas as pd
+
+from errors import FileCsvNotFoundError, PartitionParamsNotValid, ShardManifestNotValid
+from constants import (
+    API_KEY,
+    expected_header,
+    partition_num_shards,
+    partition_manifest,
+    use_lsh_index,
+    verbose,
+)
+from main import GroupPeople
+
+# Partition-and-merge execution:
+# 1. plan  => split the input file into shard files by normalized city name
+# 2. work  => any number of workers (on any machine with access to shards_dir) group the shards
+# 3. merge => concat the shard results in one globally sorted output file
+# The output matches the output of process_file only within one partition key (city name):
+# addresses with different city names in different shards are never compared (fuzzy compare and delta)
+
+
+def partition_key(group_people: GroupPeople, address: str) -> str:
+    """
+    This function returns the city name from the normalized city section (preprocess_section)
+    The postcode is removed, so "sofia 1000" and "sofia" have same key.
+    If the city section has only postcode the postcode is the key.
+    :param group_people:  GroupPeople
+    :param address:       str => address
+    :return:              str => partition key ("" if the address has no city section)
+    """
+    sections = str(address).lower().split(", ")
+    if len(sections) < 2:
+        return ""
+    city_section = group_people.preprocess_section(sections[1])
+    city = re.sub(r"\d+", "", city_section).strip()
+    return city if city else city_section
+
+
+def plan_shards(
+    input_file: str,
+    shards_dir: str,
+    num_shards: int = partition_num_shards,
+    geocode_api: bool = False,
+    delta: float = None,
+) -> dict:
+    """
+    This function splits the input file into shard files and writes manifest in shards_dir
+    All addresses with same partition key are in same shard
+    :param input_file:   str   => input csv file
+    :param shards_dir:   str   => shared directory for shards and results
+    :param num_shards:   int   => max number of shards
+    :param geocode_api:  bool  => use geocode api in the workers
+    :param delta:        float => delta for the workers
+    :return:             dict  => manifest
+    """
+    if num_shards < 1:
+        raise PartitionParamsNotValid("num_shards must be positive integer!")
+    group_people = GroupPeople(
+        geoapify_key=API_KEY, input_file=input_file, output_dir=shards_dir
+    )
+    group_people.verbose = verbose
+    if group_people.validate_input() != 200:
+        raise FileCsvNotFoundError("Error in validating input file or shards directory")
+    try:
+        data = pd.read_csv(input_file)
+    except:
+        raise FileCsvNotFoundError("Error in opening file")
+    group_people.validate_header(data)
+    data = group_people.basic_preprocess_df(data)
+
+    # Remove shards, locks and results of previous plan in shards_dir
+    for pattern in ["shard_*.csv", "shard_*.lock", "shard_*.tmp", partition_manifest]:
+        for path in glob.glob(os.path.join(shards_dir, pattern)):
+            os.remove(path)
+    # Results and locks of the workers are tagged with plan_id
+    # => worker still running with previous plan can not write result for this plan
+    plan_id = uuid.uuid4().hex
+
+    # Stable hash of the partition key => same shard on every machine
+    shard_ids = data["Address"].apply(
+        lambda x: zlib.crc32(partition_key(group_people, x).encode("utf-8"))
+        % num_shards
+    )
+    shards = []
+    for shard_id, shard_data in data.groupby(shard_ids):
+        shard_file = f"shard_{shard_id:04d}.csv"
+        shard_data[expected_header].to_csv(
+            os.path.join(shards_dir, shard_file), index=False
+        )
+        shards.append(shard_file)
+        group_people.verbose_print(f"Shard {shard_file} => {len(shard_data)} rows")
+
+    manifest = {
+        "plan_id": plan_id,
+        "input_file": input_file,
+        "num_shards": num_shards,
+        "geocode_api": geocode_api,
+        "delta": delta,
+        "use_lsh": use_lsh_index,
+        "shards": shards,
+    }
+    with open(os.path.join(shards_dir, partition_manifest), "w") as file:
+        json.dump(manifest, file, indent=4)
+    return manifest
+
+
+def load_manifest(shards_dir: str) -> dict:
+    """
+    This function loads the manifest written by plan_shards
+    :param shards_dir:  str  => shared directory for shards and results
+    :return:            dict => manifest
+    """
+    try:
+        with open(os.path.join(shards_dir, partition_manifest)) as file:
+            return json.load(file)
+    except (Exception,):
+        raise ShardManifestNotValid(f"Error in opening manifest in {shards_dir}")
+
+
+def shard_result_path(shards_dir: str, shard_file: str, plan_id: str) -> str:
+    return os.path.join(shards_dir, shard_file.replace(".csv", f".{plan_id}.result.csv"))
+
+
+def shard_lock_path(shards_dir: str, shard_file: str, plan_id: str) -> str:
+    return os.path.join(shards_dir, shard_file.replace(".csv", f".{plan_id}.lock"))
+
+
+def claim_shard(shards_dir: str, shard_file: str, plan_id: str) -> bool:
+    """
+    This function claims the shard for the current worker by creating lock file
+    os.O_EXCL guarantees that only one worker creates the lock file
+    :param shards_dir:  str  => shared directory for shards and results
+    :param shard_file:  str  => shard file name
+    :param plan_id:     str  => plan_id from the manifest
+    :return:            bool => True if the shard is claimed
+    """
+    if os.path.exists(shard_result_path(shards_dir, shard_file, plan_id)):
+        return False
+    lock_path = shard_lock_path(shards_dir, shard_file, plan_id)
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.write(fd, f"{socket.gethostname()} {os.getpid()}".encode("utf-8"))
+    os.close(fd)
+    return True
+
+
+def run_worker(shards_dir: str) -> list:
+    """
+    This function groups all shards which are still not claimed by other workers
+    The result of every shard is saved next to the shard file as shard_xxxx.<plan_id>.result.csv
+    If the grouping of a shard fails, the lock is removed, so the shard can be processed again
+    :param shards_dir:  str  => shared directory for shards and results
+    :return:            list => processed shard files
+    """
+    manifest = load_manifest(shards_dir)
+    plan_id = manifest["plan_id"]
+    processed = []
+    for shard_file in manifest["shards"]:
+        if not claim_shard(shards_dir, shard_file, plan_id):
+            continue
+        shard_path = os.path.join(shards_dir, shard_file)
+        group_people = GroupPeople(
+            geoapify_key=API_KEY,
+            input_file=shard_path,
+            output_dir=shards_dir,
+            delta=manifest["delta"],
+        )
+        group_people.verbose = verbose
+        group_people.geocode_api = manifest["geocode_api"]
+        group_people.go_preprocessing_address = not manifest["geocode_api"]
+        group_people.use_lsh = manifest["use_lsh"]
+        group_people.verbose_print("-" * 100, f"Process shard {shard_file}")
+
+        res_path = shard_result_path(shards_dir, shard_file, plan_id)
+        try:
+            data = group_people.basic_preprocess_df(pd.read_csv(shard_path))
+            temp_result = group_people.group_data(data)
+            # Write to temp file and rename => the result file is never partially written
+            temp_result[["GroupedNames"]].to_csv(f"{res_path}.tmp", index=False)
+            os.replace(f"{res_path}.tmp", res_path)
+        except (Exception,) as error:
+            print(f"Error in processing shard {shard_file} => {error}")
+            os.remove(shard_lock_path(shards_dir, shard_file, plan_id))
+            continue
+        processed.append(shard_file)
+    return processed
+
+
+def merge_shards(shards_dir: str, output_dir: str) -> str:
+    """
+    This function merges the results of all shards in one sorted result file
+    :param shards_dir:  str => shared directory for shards and results
+    :param output_dir:  str => output directory for the result file
+    :return:            str => full path for result file
+    """
+    manifest = load_manifest(shards_dir)
+    results = []
+    for shard_file in manifest["shards"]:
+        res_path = shard_result_path(shards_dir, shard_file, manifest["plan_id"])
+        if not os.path.isfile(res_path):
+            raise ShardManifestNotValid(f"Shard {shard_file} is still not processed")
+        results.append(pd.read_csv(res_path))
+
+    # Empty input file => no shards => empty result like process_file
+    if not results:
+        temp_result = pd.DataFrame(columns=["GroupedNames"])
+    else:
+        temp_result = pd.concat(results, ignore_index=True)
+        temp_result.drop_duplicates(inplace=True)
+        temp_result = temp_result.sort_values(by="GroupedNames")
+
+    group_people = GroupPeople(
+        geoapify_key=API_KEY, input_file=manifest["input_file"], output_dir=output_dir
+    )
+    group_people.verbose = verbose
+    os.makedirs(output_dir, exist_ok=True)
+    return group_people.save_result(temp_result)
+
+
+if __name__ == "__main__":
+    usage = (
+        "Usage:\n"
+        "python3 partition.py plan input.csv shards_dir [num_shards] [geocode y/n] [delta]\n"
+        "python3 partition.py work shards_dir\n"
+        "python3 partition.py merge shards_dir output_dir"
+    )
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+    command = sys.argv[1]
+    if command == "plan" and len(sys.argv) >= 4:
+        plan_shards(
+            input_file=sys.argv[2],
+            shards_dir=sys.argv[3],
+            num_shards=int(sys.argv[4]) if len(sys.argv) > 4 else partition_num_shards,
+            geocode_api=len(sys.argv) > 5 and sys.argv[5].lower() == "y",
+            delta=float(sys.argv[6]) if len(sys.argv) > 6 else None,
+        )
+    elif command == "work":
+        print(f"Processed shards: {run_worker(sys.argv[2])}")
+    elif command == "merge" and len(sys.argv) >= 4:
+        print(f"Result file: {merge_shards(sys.argv[2], sys.argv[3])}")
+    else:
+        print(usage)
+        sys.exit(1)
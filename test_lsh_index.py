@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from errors import LshIndexParamsNotValid
+from lsh_index import MinHashLSHIndex
+from main import GroupPeople
+
+ADDRESSES_A = [
+    "street vitosha 10, sofia 1000, bulgaria",
+    "street vitosa 10, sofia 1000, bulgaria",
+    "avenue graf ignatiev 5, plovdiv 4000, bulgaria",
+]
+ADDRESSES_B = [
+    "street vitosha 10, sofia 1000, bulgria",
+    "road shipka 3, varna 9000, bulgaria",
+]
+
+
+def pair(key_1, key_2):
+    return tuple(sorted([key_1, key_2]))
+
+
+def build_index(addresses):
+    index = MinHashLSHIndex()
+    for address in addresses:
+        index.add(address, address)
+    return index
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "index.npz")
+    index = build_index(ADDRESSES_A)
+    index.save(path)
+    loaded = MinHashLSHIndex.load(path)
+
+    assert loaded.keys == index.keys
+    assert not loaded.changed
+    assert loaded.candidate_pairs() == index.candidate_pairs()
+    assert pair(ADDRESSES_A[0], ADDRESSES_A[1]) in loaded.candidate_pairs()
+
+
+def test_extend_loaded_index(tmp_path):
+    path = str(tmp_path / "index.npz")
+    build_index(ADDRESSES_A).save(path)
+    index = MinHashLSHIndex.load(path)
+    for address in ADDRESSES_B:
+        index.add(address, address)
+    index.save(path)
+
+    loaded = MinHashLSHIndex.load(path)
+    assert len(loaded) == len(ADDRESSES_A) + len(ADDRESSES_B)
+    assert ADDRESSES_A[0] in loaded.query(ADDRESSES_B[0])
+    assert loaded.candidate_pairs() == build_index(
+        ADDRESSES_A + ADDRESSES_B
+    ).candidate_pairs()
+
+
+def test_load_rejects_wrong_signatures(tmp_path):
+    path = str(tmp_path / "index.npz")
+    index = build_index(ADDRESSES_A)
+    index.save(path)
+    with np.load(path) as data:
+        arrays = dict(data)
+    arrays["band_hashes"] = arrays["band_hashes"] + np.uint64(1)
+    with open(path, "wb") as file:
+        np.savez(file, **arrays)
+
+    with pytest.raises(LshIndexParamsNotValid):
+        MinHashLSHIndex.load(path)
+
+
+def test_candidate_pairs_only_for_given_keys():
+    index = build_index(ADDRESSES_A + ADDRESSES_B)
+    pairs = index.candidate_pairs(ADDRESSES_B)
+
+    assert all(key in ADDRESSES_B for key_pair in pairs for key in key_pair)
+    assert pair(ADDRESSES_A[0], ADDRESSES_B[0]) not in pairs
+    assert pair(ADDRESSES_A[0], ADDRESSES_B[0]) in index.candidate_pairs()
+    assert pair(ADDRESSES_A[0], ADDRESSES_A[1]) in index.candidate_pairs(ADDRESSES_A)
+
+
+def test_fuzzy_compare_lsh_same_as_fuzzy_compare(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "similarity_score_threshold", 80)
+    data = pd.DataFrame(
+        [
+            ["P0", ADDRESSES_A[0]],
+            ["P1", ADDRESSES_A[1]],
+            ["P2", ADDRESSES_A[2]],
+            ["P3", ADDRESSES_B[0]],
+            ["P4", ADDRESSES_B[1]],
+            ["P5", ADDRESSES_B[1]],
+        ],
+        columns=["Name", "Address"],
+    )
+    group_people = GroupPeople(geoapify_key="", input_file="", output_dir="")
+    group_people.lsh_index_path = str(tmp_path / "index.npz")
+    expected = sorted(group_people.fuzzy_compare(data)["GroupedNames"])
+
+    assert sorted(group_people.fuzzy_compare_lsh(data)["GroupedNames"]) == expected
+    # Second run uses the saved index
+    assert sorted(group_people.fuzzy_compare_lsh(data)["GroupedNames"]) == expected
@@ -0,0 +1,93 @@
+import csv
+import os
+
+import pandas as pd
+import pytest
+
+import partition
+from main import GroupPeople
+
+
+def write_input(path, rows):
+    pd.DataFrame(rows, columns=["Name", "Address"]).to_csv(path, index=False)
+    return str(path)
+
+
+def read_result(path):
+    # First line is the empty header written by save_result
+    with open(path) as file:
+        return [row[0] for row in csv.reader(file)][1:]
+
+
+def run_partition(input_file, shards_dir, output_dir, num_shards=16):
+    partition.plan_shards(input_file, str(shards_dir), num_shards=num_shards)
+    partition.run_worker(str(shards_dir))
+    return read_result(partition.merge_shards(str(shards_dir), str(output_dir)))
+
+
+def test_merged_output_contains_every_name(tmp_path):
+    rows = [
+        ["P0", "ul. Vitosha 10, Sofia 1000, Bulgaria"],
+        ["P1", "Graf Ignatiev 5, Plovdiv 4000, Bulgaria"],
+        ["P2", "Shipka 3, Varna 9000, Bulgaria"],
+        ["P3", "Shipka 3, Varna 9000, Bulgaria"],
+        ["P4", "Oak street 99, Burgas 8000, Bulgaria"],
+    ]
+    input_file = write_input(tmp_path / "input.csv", rows)
+    result = run_partition(input_file, tmp_path / "shards", tmp_path / "out")
+
+    names = {name for group in result for name in group.split(", ")}
+    assert names == {row[0] for row in rows}
+    assert result == sorted(result)
+
+
+def test_fuzzy_compare_single_row():
+    group_people = GroupPeople(geoapify_key="", input_file="", output_dir="")
+    data = pd.DataFrame([["P0", "shipka 3, varna 9000"]], columns=["Name", "Address"])
+    assert group_people.fuzzy_compare(data)["GroupedNames"].tolist() == ["P0"]
+
+
+def test_partition_key_ignores_postcode():
+    group_people = GroupPeople(geoapify_key="", input_file="", output_dir="")
+    assert partition.partition_key(
+        group_people, "Shipka 3, Sofia 1000, Bulgaria"
+    ) == partition.partition_key(group_people, "Shipka 3, Sofia, Bulgaria")
+
+
+def test_plan_again_ignores_previous_results(tmp_path):
+    file_a = write_input(tmp_path / "a.csv", [["A0", "Shipka 3, Varna 9000, Bulgaria"]])
+    file_b = write_input(tmp_path / "b.csv", [["B0", "Shipka 3, Varna 9000, Bulgaria"]])
+    shards_dir = tmp_path / "shards"
+    assert run_partition(file_a, shards_dir, tmp_path / "out_a") == ["A0"]
+    assert run_partition(file_b, shards_dir, tmp_path / "out_b") == ["B0"]
+
+
+def test_failed_shard_removes_lock(tmp_path, monkeypatch):
+    input_file = write_input(tmp_path / "input.csv", [["P0", "Shipka 3, Varna 9000"]])
+    shards_dir = str(tmp_path / "shards")
+    manifest = partition.plan_shards(input_file, shards_dir)
+
+    def fail(self, data):
+        raise ValueError("broken shard")
+
+    monkeypatch.setattr(GroupPeople, "group_data", fail)
+    assert partition.run_worker(shards_dir) == []
+    for shard_file in manifest["shards"]:
+        lock_path = partition.shard_lock_path(shards_dir, shard_file, manifest["plan_id"])
+        assert not os.path.exists(lock_path)
+    with pytest.raises(partition.ShardManifestNotValid):
+        partition.merge_shards(shards_dir, str(tmp_path / "out"))
+
+    monkeypatch.undo()
+    assert partition.run_worker(shards_dir) == manifest["shards"]
+
+
+def test_empty_input_file(tmp_path):
+    input_file = write_input(tmp_path / "input.csv", [])
+    assert run_partition(input_file, tmp_path / "shards", tmp_path / "out") == []
+
+
+def test_plan_rejects_zero_shards(tmp_path):
+    input_file = write_input(tmp_path / "input.csv", [["P0", "Shipka 3, Varna 9000"]])
+    with pytest.raises(partition.PartitionParamsNotValid):
+        partition.plan_shards(input_file, str(tmp_path / "shards"), num_shards=0)